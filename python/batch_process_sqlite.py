@@ -4,24 +4,33 @@ Synchronous version - no async/await, no network DB latency.
 """
 
 import logging
+import multiprocessing
+import re
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 
 from db_sqlite import (
-    add_section_speaker,
-    add_sitting_attendance,
+    add_section_speakers_bulk,
+    add_sitting_attendance_bulk,
     close_connection,
     create_or_update_sitting,
-    create_section,
+    create_sections_bulk,
     find_ministry_by_acronym,
     create_bill,
     find_bill_for_second_reading,
-    find_or_create_member,
+    find_or_create_members,
     get_bill_count,
     get_member_count,
     get_section_count,
     get_sitting_count,
     init_db,
+    load_member_index,
+    transaction,
 )
 from hansard_api import HansardAPI
 from parliament_sitting import BILL_TYPES
@@ -33,6 +42,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+FETCH_WORKERS = 4  # Hansard reports fetched and parsed ahead while earlier dates are ingested
+
+# HansardAPI for this process, created on first fetch so each fetch worker
+# keeps its requests.Session (and its keep-alive connections) across dates
+_api = None
+
 # Maps ministerial designations to ministry acronyms.
 # Includes "Minister for X", "Minister of State for X", and
 # "Parliamentary Secretary for X" variants so that all designation
@@ -65,6 +80,22 @@ for _topic, _acronym in _MINISTRY_TOPICS.items():
     DESIGNATION_TO_MINISTRY[f"Minister of State for {_topic}"] = _acronym
     DESIGNATION_TO_MINISTRY[f"Parliamentary Secretary for {_topic}"] = _acronym
 
+# Single-pass matchers for designations. When several designations match,
+# the earliest entry in DESIGNATION_TO_MINISTRY wins. For content, PMO
+# designations are kept separate since they only apply when no other
+# ministry matches.
+_DESIGNATION_RANK = {designation.lower(): i for i, designation in enumerate(DESIGNATION_TO_MINISTRY)}
+_DESIGNATION_ACRONYMS = {designation.lower(): acronym for designation, acronym in DESIGNATION_TO_MINISTRY.items()}
+_DESIGNATION_RE = re.compile(
+    "|".join(re.escape(d) for d in DESIGNATION_TO_MINISTRY), re.IGNORECASE
+)
+_MINISTER_RE = re.compile("|".join(
+    re.escape(d) for d, acronym in DESIGNATION_TO_MINISTRY.items() if acronym != "PMO"
+))
+_PMO_RE = re.compile("|".join(
+    re.escape(d) for d, acronym in DESIGNATION_TO_MINISTRY.items() if acronym == "PMO"
+))
+
 
 FULL_NAME_TO_MINISTRY = {
     "Prime Minister's Office": "PMO",
@@ -85,6 +116,12 @@ FULL_NAME_TO_MINISTRY = {
     "Ministry of Transport": "MOT",
 }
 
+# Single-pass matcher for titles; as with designations, the earliest entry
+# in FULL_NAME_TO_MINISTRY wins when several match
+_FULL_NAME_RANK = {name: i for i, name in enumerate(FULL_NAME_TO_MINISTRY)}
+_FULL_NAME_RE = re.compile("|".join(re.escape(name) for name in FULL_NAME_TO_MINISTRY))
+
+@lru_cache(maxsize=4096)
 def detect_ministry_from_designation(designation):
     """Extract ministry acronym from a ministerial designation.
 
@@ -93,11 +130,15 @@ def detect_ministry_from_designation(designation):
     """
     if not designation:
         return None
-    designation_lower = designation.lower()
-    for keyword, acronym in DESIGNATION_TO_MINISTRY.items():
-        if keyword.lower() in designation_lower:
-            return acronym
-    return None
+    return _first_designation_acronym(_DESIGNATION_RE.finditer(designation))
+
+
+def _first_designation_acronym(matches):
+    """Return the acronym of the earliest DESIGNATION_TO_MINISTRY entry matched."""
+    found = {m.group(0).lower() for m in matches}
+    if not found:
+        return None
+    return _DESIGNATION_ACRONYMS[min(found, key=_DESIGNATION_RANK.__getitem__)]
 
 
 def detect_ministry_from_content(content_plain):
@@ -109,15 +150,11 @@ def detect_ministry_from_content(content_plain):
 
     # Check specific ministry designations first, PMO last so that
     # "Prime Minister and Minister for Finance" matches MOF not PMO
-    pmo_match = False
-    for designation, acronym in DESIGNATION_TO_MINISTRY.items():
-        if designation in preamble:
-            if acronym == "PMO":
-                pmo_match = True
-            else:
-                return acronym
-
-    if pmo_match:
+    acronym = _first_designation_acronym(_MINISTER_RE.finditer(preamble))
+    if acronym:
+        return acronym
+
+    if _PMO_RE.search(preamble):
         return "PMO"
 
     return None
@@ -132,12 +169,13 @@ def detect_ministry_from_speakers(speakers):
                 return ministry
     return None
 
+@lru_cache(maxsize=4096)
 def detect_ministry_from_title(title):
     """Detect ministry from section title."""
-    for name, acronym in FULL_NAME_TO_MINISTRY.items():
-        if name in title:
-            return acronym
-    return None
+    found = {m.group(0) for m in _FULL_NAME_RE.finditer(title)}
+    if not found:
+        return None
+    return FULL_NAME_TO_MINISTRY[min(found, key=_FULL_NAME_RANK.__getitem__)]
 
 def detect_ministry(section):
     """Detect ministry for a section using content and speaker info."""
@@ -150,19 +188,12 @@ def detect_ministry(section):
     return detect_ministry_from_speakers(section.get("speakers", []))
 
 
-def process_speaker(section_id, speaker):
-    """Process a single speaker for a section."""
-    member_id = find_or_create_member(speaker.name)
-    add_section_speaker(
-        section_id=section_id,
-        member_id=member_id,
-        constituency=getattr(speaker, "constituency", None),
-        designation=getattr(speaker, "appointment", None),
-    )
-
-
 def process_section(sitting_id, idx, section, date_str):
-    """Process a single section and its speakers."""
+    """Resolve a section's ministry and bill.
+
+    Returns the section's row for create_sections_bulk(); bills are created
+    here so that same-day second readings can find them.
+    """
     # Adjournment motions are raised by individual MPs on any topic;
     # the answering minister is incidental, so skip ministry tagging.
     if section.get("category") == "adjournment_motion":
@@ -198,37 +229,61 @@ def process_section(sitting_id, idx, section, date_str):
             ministry_id=ministry_id,
         )
 
-    # Create section
-    section_id = create_section(
-        sitting_id=sitting_id,
-        ministry_id=ministry_id,
-        bill_id=bill_id,
-        category=section.get("category", "other"),
-        section_type=section_type,
-        title=section["title"],
-        content_html=section["content_html"],
-        content_plain=section["content_plain"],
-        section_order=section["order"],
-        source_url=section.get("source_url"),
+    return (
+        sitting_id,
+        ministry_id,
+        bill_id,
+        section.get("category", "other"),
+        section_type,
+        section["title"],
+        section["content_html"],
+        section["content_plain"],
+        section["order"],
+        section.get("source_url"),
     )
 
-    # Process speakers
-    for speaker in section["speakers"]:
-        process_speaker(section_id, speaker)
 
-    return section_id
+def process_speakers(section_speakers):
+    """Save the speakers of many sections in one batch.
+
+    Takes a list of (section_id, speaker) pairs.
+    """
+    if not section_speakers:
+        return
+
+    member_ids = find_or_create_members(speaker.name for _, speaker in section_speakers)
+    add_section_speakers_bulk([
+        (
+            section_id,
+            member_ids[speaker.name],
+            getattr(speaker, "constituency", None),
+            getattr(speaker, "appointment", None),
+        )
+        for section_id, speaker in section_speakers
+    ])
+
 
+def process_attendance(sitting_id, parliament_sitting):
+    """Process attendance for all MPs in a sitting. Returns the number saved."""
+    attendance = [(mp, True) for mp in parliament_sitting.present_members]
+    attendance += [(mp, False) for mp in parliament_sitting.absent_members]
+    if not attendance:
+        return 0
 
-def process_attendance(sitting_id, mp, present):
-    """Process attendance for a single MP."""
-    member_id = find_or_create_member(mp.name)
-    add_sitting_attendance(
-        sitting_id=sitting_id,
-        member_id=member_id,
-        present=present,
-        constituency=mp.constituency,
-        designation=mp.appointment,
-    )
+    member_ids = find_or_create_members(mp.name for mp, _ in attendance)
+    add_sitting_attendance_bulk([
+        (sitting_id, member_ids[mp.name], present, mp.constituency, mp.appointment)
+        for mp, present in attendance
+    ])
+    return len(attendance)
+
+
+def fetch_sitting(date_str: str):
+    """Fetch and parse a single sitting from the Hansard API."""
+    global _api
+    if _api is None:
+        _api = HansardAPI()
+    return _api.fetch_by_date(date_str)
 
 
 def ingest_sitting(date_str: str) -> str:
@@ -236,11 +291,15 @@ def ingest_sitting(date_str: str) -> str:
     Fetch and ingest a single sitting into SQLite.
     Returns sitting ID if successful, None otherwise.
     """
-    logger.info(f"Processing sitting for {date_str}...")
+    return save_sitting(date_str, fetch_sitting(date_str))
 
-    # Fetch from Hansard API
-    api = HansardAPI()
-    parliament_sitting = api.fetch_by_date(date_str)
+
+def save_sitting(date_str: str, parliament_sitting) -> str:
+    """
+    Ingest an already fetched sitting into SQLite.
+    Returns sitting ID if successful, None otherwise.
+    """
+    logger.info(f"Processing sitting for {date_str}...")
 
     if not parliament_sitting:
         logger.info(f"No data found for {date_str}")
@@ -248,6 +307,7 @@ def ingest_sitting(date_str: str) -> str:
 
     sections = parliament_sitting.get_sections()
     metadata = parliament_sitting.get_metadata()
+    sitting_date = metadata.get("date")
 
     if not sections:
         logger.info(f"No sections found for {date_str}")
@@ -256,30 +316,6 @@ def ingest_sitting(date_str: str) -> str:
     # Create sitting URL
     sitting_url = f"https://sprs.parl.gov.sg/search/#/fullreport?sittingdate={date_str}"
 
-    # Create/Update Sitting
-    sitting_id = create_or_update_sitting(
-        date_str=metadata.get("date"),
-        sitting_no=metadata.get("sitting_no"),
-        parliament=metadata.get("parliament"),
-        session_no=metadata.get("session_no"),
-        volume_no=metadata.get("volume_no"),
-        format_type=metadata.get("format"),
-        url=sitting_url,
-    )
-    logger.info(f"   Sitting ID: {sitting_id}")
-
-    # Process attendance
-    attendance_count = 0
-    for mp in parliament_sitting.present_members:
-        process_attendance(sitting_id, mp, True)
-        attendance_count += 1
-
-    for mp in parliament_sitting.absent_members:
-        process_attendance(sitting_id, mp, False)
-        attendance_count += 1
-
-    logger.info(f"   Saved attendance for {attendance_count} members")
-
     # Process sections — ensure BI (first readings) are processed before BP (second readings)
     # so that bills exist before second reading sections try to find them (same-day case)
     def section_sort_key(item):
@@ -293,48 +329,124 @@ def ingest_sitting(date_str: str) -> str:
 
     sorted_sections = sorted(enumerate(sections), key=section_sort_key)
 
-    logger.info(f"   Processing {len(sections)} sections...")
-    section_ids = []
+    # Save the whole sitting in one transaction, so a failure part way
+    # through leaves no partial sitting behind
+    with transaction():
+        # Create/Update Sitting
+        sitting_id = create_or_update_sitting(
+            date_str=sitting_date,
+            sitting_no=metadata.get("sitting_no"),
+            parliament=metadata.get("parliament"),
+            session_no=metadata.get("session_no"),
+            volume_no=metadata.get("volume_no"),
+            format_type=metadata.get("format"),
+            url=sitting_url,
+        )
+        logger.debug(f"   Sitting ID: {sitting_id}")
+
+        # Process attendance
+        attendance_count = process_attendance(sitting_id, parliament_sitting)
+        logger.info(f"   Saved attendance for {attendance_count} members")
+
+        logger.debug(f"   Processing {len(sections)} sections...")
+        section_rows = []
 
-    for idx, section in sorted_sections:
-        section_id = process_section(sitting_id, idx, section, metadata.get("date"))
-        section_ids.append(section_id)
+        for idx, section in sorted_sections:
+            section_rows.append(process_section(sitting_id, idx, section, sitting_date))
 
-        # Log progress every 10 sections
-        if (idx + 1) % 10 == 0:
-            logger.info(f"     Processed {idx + 1}/{len(sections)} sections")
+            # Log progress every 10 sections
+            if (idx + 1) % 10 == 0:
+                logger.debug(f"     Processed {idx + 1}/{len(sections)} sections")
+
+        # Save all sections, then all their speakers, in one batch each
+        section_ids = create_sections_bulk(section_rows)
+        process_speakers([
+            (section_id, speaker)
+            for section_id, (_, section) in zip(section_ids, sorted_sections)
+            for speaker in section["speakers"]
+        ])
 
     logger.info(f"   Processed {len(section_ids)} sections for {date_str}")
     return sitting_id
 
 
+def _submit_fetch(executor, date_str: str):
+    """Queue a fetch in the worker pool, or return None if the pool is broken."""
+    try:
+        return executor.submit(fetch_sitting, date_str)
+    except BrokenProcessPool:
+        return None
+
+
+def _fetch_result(date_str: str, fetch):
+    """Return a queued fetch's sitting, fetching it here if the pool broke."""
+    if fetch is not None:
+        try:
+            return fetch.result()
+        except BrokenProcessPool:
+            logger.warning(f"Fetch worker died before {date_str} was fetched; fetching it here")
+    return fetch_sitting(date_str)
+
+
+def date_range(start_date: datetime, end_date: datetime):
+    """Yield each date from start_date to end_date inclusive as DD-MM-YYYY."""
+    for i in range((end_date - start_date).days + 1):
+        yield (start_date + timedelta(days=i)).strftime("%d-%m-%Y")
+
+
 def batch_process(start_date_str: str, end_date_str: str):
     """
     Process all sittings in a date range.
     """
     # Initialize database
     init_db()
+    load_member_index()
 
     start_date = datetime.strptime(start_date_str, "%d-%m-%Y")
     end_date = datetime.strptime(end_date_str, "%d-%m-%Y")
 
-    # Generate all dates in range
-    dates = []
-    curr = start_date
-    while curr <= end_date:
-        dates.append(curr.strftime("%d-%m-%Y"))
-        curr += timedelta(days=1)
+    num_days = (end_date - start_date).days + 1
 
     logger.info(
-        f"Checking date range: {start_date_str} to {end_date_str} ({len(dates)} days)"
+        f"Checking date range: {start_date_str} to {end_date_str} ({num_days} days)"
     )
 
+    # Re-ingesting a date reuses its sitting ID, so only count each sitting once
     ingested_sittings = []
+    seen = set()
+
+    # Fetching and HTML parsing run ahead in worker processes, so parsing is
+    # not serialised by the GIL. Sittings are still ingested one at a time in
+    # date order so bills are created before later readings need them.
+    # Workers are spawned, not forked, so they never inherit the open SQLite
+    # connection
+    with ProcessPoolExecutor(
+        max_workers=FETCH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        dates = date_range(start_date, end_date)
+        fetches = deque(
+            (date_str, _submit_fetch(executor, date_str))
+            for date_str in islice(dates, FETCH_WORKERS)
+        )
+
+        while fetches:
+            date_str, fetch = fetches.popleft()
+
+            # Keep FETCH_WORKERS fetches in flight while this one is ingested
+            for next_date in islice(dates, 1):
+                fetches.append((next_date, _submit_fetch(executor, next_date)))
+
+            # A sitting that fails to fetch or parse is skipped, not fatal
+            try:
+                parliament_sitting = _fetch_result(date_str, fetch)
+            except Exception as e:
+                logger.error(f"Error fetching {date_str}: {e}")
+                continue
 
-    for date_str in dates:
-        sitting_id = ingest_sitting(date_str)
-        if sitting_id:
-            ingested_sittings.append(sitting_id)
+            sitting_id = save_sitting(date_str, parliament_sitting)
+            if sitting_id and sitting_id not in seen:
+                seen.add(sitting_id)
+                ingested_sittings.append(sitting_id)
 
     # Print summary
     logger.info("\n" + "=" * 50)
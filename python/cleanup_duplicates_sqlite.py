@@ -16,35 +16,40 @@ def cleanup(start_date_str, end_date_str, keep_newest=False):
     start_date = datetime.strptime(start_date_str, '%d-%m-%Y').strftime('%Y-%m-%d')
     end_date = datetime.strptime(end_date_str, '%d-%m-%Y').strftime('%Y-%m-%d')
 
-    # 1. Get sittings in the date range
-    sittings = conn.execute(
-        "SELECT id, date FROM sittings WHERE date >= ? AND date <= ?",
+    # 1. Count sittings in the date range
+    sitting_count = conn.execute(
+        "SELECT COUNT(*) FROM sittings WHERE date >= ? AND date <= ?",
         (start_date, end_date)
-    ).fetchall()
+    ).fetchone()[0]
 
-    if not sittings:
+    if not sitting_count:
         print(f"No sittings found in range {start_date_str} to {end_date_str}.")
         return
 
-    sitting_ids = [row[0] for row in sittings]
-    print(f"Cleaning duplicates in {len(sittings)} sitting(s)...")
+    print(f"Cleaning duplicates in {sitting_count} sitting(s)...")
 
-    # 2. Count duplicates before deletion
-    placeholders = ','.join('?' * len(sitting_ids))
+    # 2. Find duplicates once; the count and the delete both use this list.
+    # Sittings are selected by date in SQL rather than passed as a
+    # parameter list, which long ranges could push past SQLite's limit.
     order = 'DESC' if keep_newest else 'ASC'
 
-    count_query = f"""
-    SELECT COUNT(*) FROM (
+    conn.execute("DROP TABLE IF EXISTS temp.dup_ids")
+    dup_query = f"""
+    CREATE TEMP TABLE dup_ids AS
+    SELECT id FROM (
         SELECT id,
                ROW_NUMBER() OVER (
                    PARTITION BY sitting_id, section_title, section_type
                    ORDER BY created_at {order}, id ASC
                ) as rnum
         FROM sections
-        WHERE sitting_id IN ({placeholders})
+        WHERE sitting_id IN (
+            SELECT id FROM sittings WHERE date >= ? AND date <= ?
+        )
     ) WHERE rnum > 1
     """
-    dup_count = conn.execute(count_query, sitting_ids).fetchone()[0]
+    conn.execute(dup_query, (start_date, end_date))
+    dup_count = conn.execute("SELECT COUNT(*) FROM dup_ids").fetchone()[0]
     print(f"Found {dup_count} duplicate section(s).")
 
     if dup_count == 0:
@@ -53,22 +58,8 @@ def cleanup(start_date_str, end_date_str, keep_newest=False):
         return
 
     # 3. Delete duplicates (keep first by created_at, or newest if --keep-newest)
-    delete_query = f"""
-    DELETE FROM sections
-    WHERE id IN (
-        SELECT id FROM (
-            SELECT id,
-                   ROW_NUMBER() OVER (
-                       PARTITION BY sitting_id, section_title, section_type
-                       ORDER BY created_at {order}, id ASC
-                   ) as rnum
-            FROM sections
-            WHERE sitting_id IN ({placeholders})
-        ) WHERE rnum > 1
-    )
-    """
-    conn.execute(delete_query, sitting_ids)
-    conn.commit()
+    conn.execute("DELETE FROM sections WHERE id IN (SELECT id FROM dup_ids)")
+    conn.execute("DROP TABLE dup_ids")
 
     print(f"Deleted {dup_count} duplicate section(s).")
 
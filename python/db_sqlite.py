@@ -3,9 +3,11 @@ SQLite database module for Parliament Summarizer.
 Synchronous operations using Python's built-in sqlite3.
 """
 import os
+import re
 import sqlite3
 import uuid
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import date
 from pathlib import Path
 
 # Default database path (can be overridden via environment variable)
@@ -15,6 +17,14 @@ DB_PATH = os.getenv('PARLIAMENT_DB_PATH', str(DEFAULT_DB_PATH))
 # Global connection (reused for performance)
 _conn = None
 
+# Depth of nested transaction() blocks; only the outermost one commits
+_transaction_depth = 0
+
+# In-process lookup caches. Members are never renamed or deleted during a
+# run, and ministries are fixed reference data, so cached IDs stay valid.
+_member_ids = {}
+_ministry_ids = {}
+
 
 def get_connection() -> sqlite3.Connection:
     """Get or create a database connection."""
@@ -24,10 +34,16 @@ def get_connection() -> sqlite3.Connection:
         db_path = Path(DB_PATH)
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        _conn = sqlite3.connect(DB_PATH)
+        # Autocommit: each statement commits on its own unless it runs
+        # inside a transaction() block
+        _conn = sqlite3.connect(DB_PATH, isolation_level=None)
         _conn.row_factory = sqlite3.Row  # Enable dict-like access
         _conn.execute('PRAGMA foreign_keys = ON')
         _conn.execute('PRAGMA journal_mode = WAL')  # Better concurrent access
+        _conn.execute('PRAGMA synchronous = NORMAL')  # Safe with WAL; no fsync per commit
+        _conn.execute('PRAGMA temp_store = MEMORY')
+        _conn.execute('PRAGMA cache_size = -64000')  # 64 MB page cache
+        _conn.execute('PRAGMA mmap_size = 268435456')  # Memory-map up to 256 MB for reads
     return _conn
 
 
@@ -35,8 +51,48 @@ def close_connection():
     """Close the database connection."""
     global _conn
     if _conn:
+        # Refresh query planner statistics where they have gone stale
+        _conn.execute('PRAGMA optimize')
         _conn.close()
         _conn = None
+    clear_caches()
+
+
+def clear_caches():
+    """Forget cached member and ministry IDs, e.g. before using another database."""
+    _member_ids.clear()
+    _ministry_ids.clear()
+
+
+@contextmanager
+def transaction():
+    """Group several writes into one transaction.
+
+    The outermost block starts with BEGIN IMMEDIATE, commits when it exits
+    and rolls back if it raises. Blocks may be nested; inner blocks join
+    the outer transaction.
+    """
+    global _transaction_depth
+    conn = get_connection()
+    _transaction_depth += 1
+    try:
+        # Take the write lock up front, so another writer (e.g. the summary
+        # script) makes this wait out the busy timeout rather than fail part
+        # way through when a read turns into a write
+        if _transaction_depth == 1 and not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        yield conn
+    except BaseException:
+        if _transaction_depth == 1:
+            conn.rollback()
+            # Members created in the rolled back transaction no longer exist
+            clear_caches()
+        raise
+    else:
+        if _transaction_depth == 1:
+            conn.commit()
+    finally:
+        _transaction_depth -= 1
 
 
 def init_db():
@@ -48,48 +104,79 @@ def init_db():
         schema = f.read()
 
     conn.executescript(schema)
-    conn.commit()
     print(f"Database initialized at {DB_PATH}")
 
 
 def generate_id() -> str:
-    """Generate a UUID string for use as primary key."""
-    return str(uuid.uuid4())
+    """Generate a UUID string for use as primary key.
+
+    Uses the 32-character hex form; the first 8 characters (used in page
+    slugs) are the same as in the dashed form.
+    """
+    return uuid.uuid4().hex
+
+
+# DD-MM-YYYY, as used by the Hansard API
+_DATE_RE = re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})')
 
 
 def parse_date(date_str: str) -> str:
     """Convert DD-MM-YYYY to YYYY-MM-DD (ISO format for SQLite)."""
     if not date_str:
         return None
-    try:
-        dt = datetime.strptime(date_str, '%d-%m-%Y')
-        return dt.strftime('%Y-%m-%d')
-    except ValueError:
+    match = _DATE_RE.fullmatch(date_str)
+    if not match:
         # Already in ISO format or invalid
         return date_str
+    day, month, year = map(int, match.groups())
+    if not (1 <= month <= 12 and 1 <= day <= 28 and year):
+        # Let datetime check month lengths and leap years; invalid dates are
+        # returned unchanged, as strptime used to
+        try:
+            date(year, month, day)
+        except ValueError:
+            return date_str
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def load_member_index():
+    """Cache the IDs of all existing members, so later lookups rarely need a query."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name FROM members')
+    _member_ids.update((row['name'], row['id']) for row in cursor.fetchall())
 
 
-def find_or_create_member(name: str) -> str:
-    """Find existing member or create new one. Returns member ID."""
+def find_or_create_members(names) -> dict:
+    """Find or create many members at once. Returns a {name: member ID} dict.
+
+    Resolves every name with a handful of batched statements instead of a
+    SELECT (and possibly an INSERT) per name.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    name = name.strip()
-    # Try to find existing
-    cursor.execute('SELECT id FROM members WHERE name = ?', (name,))
-    row = cursor.fetchone()
+    stripped = {name: name.strip() for name in names}
+    uncached = [name for name in dict.fromkeys(stripped.values()) if name not in _member_ids]
 
-    if row:
-        return row['id']
+    # Chunk the IN list to stay under SQLite's bound-parameter limit
+    for i in range(0, len(uncached), 500):
+        chunk = uncached[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'SELECT id, name FROM members WHERE name IN ({placeholders})',
+            chunk
+        )
+        _member_ids.update((row['name'], row['id']) for row in cursor.fetchall())
 
-    # Create new
-    member_id = generate_id()
-    cursor.execute(
-        'INSERT INTO members (id, name) VALUES (?, ?)',
-        (member_id, name)
-    )
-    conn.commit()
-    return member_id
+    # Create the rest
+    new_members = [(generate_id(), name) for name in uncached if name not in _member_ids]
+    if new_members:
+        with transaction():
+            cursor.executemany('INSERT INTO members (id, name) VALUES (?, ?)', new_members)
+        _member_ids.update((name, member_id) for member_id, name in new_members)
+
+    return {name: _member_ids[clean] for name, clean in stripped.items()}
 
 
 def find_ministry_by_acronym(acronym: str) -> str:
@@ -97,11 +184,14 @@ def find_ministry_by_acronym(acronym: str) -> str:
     if not acronym:
         return None
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id FROM ministries WHERE acronym = ?', (acronym,))
-    row = cursor.fetchone()
-    return row['id'] if row else None
+    # Ministries are a small fixed table, so load all of them on first use
+    if not _ministry_ids:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, acronym FROM ministries WHERE acronym IS NOT NULL')
+        _ministry_ids.update((row['acronym'], row['id']) for row in cursor.fetchall())
+
+    return _ministry_ids.get(acronym)
 
 
 def create_bill(title: str, ministry_id: str = None,
@@ -119,7 +209,6 @@ def create_bill(title: str, ministry_id: str = None,
            VALUES (?, ?, ?, ?, ?)''',
         (bill_id, title, ministry_id, parse_date(first_reading_date), first_reading_sitting_id)
     )
-    conn.commit()
     return bill_id
 
 
@@ -145,7 +234,6 @@ def find_bill_for_second_reading(title: str, ministry_id: str = None) -> str:
                 'UPDATE bills SET ministry_id = ? WHERE id = ? AND ministry_id IS NULL',
                 (ministry_id, bill_id)
             )
-            conn.commit()
         return bill_id
 
     # No bill found — create one (BP without a preceding BI)
@@ -155,7 +243,6 @@ def find_bill_for_second_reading(title: str, ministry_id: str = None) -> str:
            VALUES (?, ?, ?)''',
         (bill_id, title, ministry_id)
     )
-    conn.commit()
     return bill_id
 
 
@@ -169,83 +256,82 @@ def create_or_update_sitting(date_str: str, sitting_no: int = None,
 
     iso_date = parse_date(date_str)
 
-    # Check if sitting exists
-    cursor.execute('SELECT id FROM sittings WHERE date = ?', (iso_date,))
-    row = cursor.fetchone()
-
-    if row:
-        sitting_id = row['id']
-        # Update existing
-        cursor.execute(
-            '''UPDATE sittings SET sitting_no = ?, parliament = ?, session_no = ?,
-               volume_no = ?, format = ?, url = ? WHERE id = ?''',
-            (sitting_no, parliament, session_no, volume_no, format_type, url, sitting_id)
-        )
-    else:
-        # Create new
-        sitting_id = generate_id()
-        cursor.execute(
-            '''INSERT INTO sittings (id, date, sitting_no, parliament, session_no, volume_no, format, url)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-            (sitting_id, iso_date, sitting_no, parliament, session_no, volume_no, format_type, url)
-        )
+    # Create, or update the existing sitting for this date and keep its ID
+    cursor.execute(
+        '''INSERT INTO sittings (id, date, sitting_no, parliament, session_no, volume_no, format, url)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (date) DO UPDATE SET
+           sitting_no = excluded.sitting_no,
+           parliament = excluded.parliament,
+           session_no = excluded.session_no,
+           volume_no = excluded.volume_no,
+           format = excluded.format,
+           url = excluded.url
+           RETURNING id''',
+        (generate_id(), iso_date, sitting_no, parliament, session_no, volume_no, format_type, url)
+    )
+    sitting_id = cursor.fetchone()['id']
 
-    conn.commit()
     return sitting_id
 
 
-def add_sitting_attendance(sitting_id: str, member_id: str, present: bool = True,
-                           constituency: str = None, designation: str = None):
-    """Add or update sitting attendance record."""
+def add_sitting_attendance_bulk(rows):
+    """Add or update many sitting attendance records in one batch.
+
+    Each row is (sitting_id, member_id, present, constituency, designation).
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute(
-        '''INSERT INTO sitting_attendance (sitting_id, member_id, present, constituency, designation)
-           VALUES (?, ?, ?, ?, ?)
-           ON CONFLICT (sitting_id, member_id) DO UPDATE SET
-           present = excluded.present,
-           constituency = excluded.constituency,
-           designation = excluded.designation''',
-        (sitting_id, member_id, 1 if present else 0, constituency, designation)
-    )
-    conn.commit()
+    with transaction():
+        cursor.executemany(
+            '''INSERT INTO sitting_attendance (sitting_id, member_id, present, constituency, designation)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (sitting_id, member_id) DO UPDATE SET
+               present = excluded.present,
+               constituency = excluded.constituency,
+               designation = excluded.designation''',
+            [(sitting_id, member_id, 1 if present else 0, constituency, designation)
+             for sitting_id, member_id, present, constituency, designation in rows]
+        )
+
 
+def create_sections_bulk(rows) -> list:
+    """Create many sections in one batch. Returns their IDs in row order.
 
-def create_section(sitting_id: str, category: str, section_type: str,
-                   title: str, content_html: str, content_plain: str,
-                   section_order: int, source_url: str = None,
-                   ministry_id: str = None, bill_id: str = None) -> str:
-    """Create a new section. Returns section ID."""
+    Each row is (sitting_id, ministry_id, bill_id, category, section_type,
+    title, content_html, content_plain, section_order, source_url).
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    section_id = generate_id()
-    cursor.execute(
-        '''INSERT INTO sections
-           (id, sitting_id, ministry_id, bill_id, category, section_type,
-            section_title, content_html, content_plain, section_order, source_url)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-        (section_id, sitting_id, ministry_id, bill_id, category, section_type,
-         title, content_html, content_plain, section_order, source_url)
-    )
-    conn.commit()
-    return section_id
+    section_ids = [generate_id() for _ in rows]
+    with transaction():
+        cursor.executemany(
+            '''INSERT INTO sections
+               (id, sitting_id, ministry_id, bill_id, category, section_type,
+                section_title, content_html, content_plain, section_order, source_url)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            [(section_id, *row) for section_id, row in zip(section_ids, rows)]
+        )
+    return section_ids
+
 
+def add_section_speakers_bulk(rows):
+    """Add many section speakers in one batch.
 
-def add_section_speaker(section_id: str, member_id: str,
-                        constituency: str = None, designation: str = None):
-    """Add a speaker to a section."""
+    Each row is (section_id, member_id, constituency, designation).
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute(
-        '''INSERT INTO section_speakers (section_id, member_id, constituency, designation)
-           VALUES (?, ?, ?, ?)
-           ON CONFLICT (section_id, member_id) DO NOTHING''',
-        (section_id, member_id, constituency, designation)
-    )
-    conn.commit()
+    with transaction():
+        cursor.executemany(
+            '''INSERT INTO section_speakers (section_id, member_id, constituency, designation)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (section_id, member_id) DO NOTHING''',
+            rows
+        )
 
 
 def get_sitting_count() -> int:
@@ -3,9 +3,10 @@ import logging
 import os
 import re
 import sys
+import time
 
 from google import genai
-from datetime import datetime, timedelta
+from datetime import datetime
 from dotenv import load_dotenv
 
 import db_sqlite as db
@@ -20,38 +21,161 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-client = genai.Client()
+_client = None
+
+
+def get_client() -> genai.Client:
+    """Return the shared Gemini client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = genai.Client()
+    return _client
 
 AI_SEMAPHORE = asyncio.Semaphore(20)  # Can do more parallel with Gemini but keeping safe limit
-AI_COOLDOWN = 0.5                    # Adjust to Gemini rate limitations (15 RPM free, higher paid)
+GEMINI_RPM = int(os.getenv('GEMINI_RPM', 0))  # Requests per minute allowed by the Gemini quota (0: unpaced)
+GEMINI_TPM = int(os.getenv('GEMINI_TPM', 0))  # Tokens per minute allowed by the Gemini quota (0: unpaced)
+SUMMARY_BATCH_SIZE = 25              # Summaries written per executemany/commit
+SUMMARY_FLUSH_INTERVAL = 1.0         # Max seconds a finished summary waits to be written
+MAX_CONTENT_CHARS = 20000            # Hansard text sent to Gemini per summary
+MIN_MEMBER_ACTIVITY = 3              # Contributions needed before a member is summarised
+SITTING_CONCURRENCY = 3              # Sittings whose sections are loaded and summarised at once
+
+# Runs of spaces, tabs and non-breaking spaces (newlines are preserved)
+_WS_RE = re.compile(r'[ \t\xa0]+')
+
+class RateLimiter:
+    """Token bucket pacing requests to a requests- and tokens-per-minute quota.
+
+    Callers wait before sending instead of hitting the quota and retrying.
+    Both buckets start full and refill continuously; waiters are admitted in
+    arrival order. A limit of 0 leaves that quota unpaced.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int):
+        if not self.rpm and not self.tpm:
+            return
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        async with self._lock:
+            while True:
+                self._refill()
+                has_request = not self.rpm or self._requests >= 1
+                if has_request and self._tokens >= tokens:
+                    if self.rpm:
+                        self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self._requests) * 60 / self.rpm if self.rpm else 0,
+                    (tokens - self._tokens) * 60 / self.tpm if self.tpm else 0,
+                ))
+
+AI_LIMITER = RateLimiter(GEMINI_RPM, GEMINI_TPM)
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough token cost of a request: ~4 characters per prompt token plus room for the reply."""
+    return len(prompt) // 4 + 1024
+
+def run(coro):
+    """Run a coroutine on a fresh event loop with eager task execution.
+
+    Summary tasks that finish without awaiting (e.g. bills too short to
+    summarise) complete immediately instead of taking a trip through the loop.
+    """
+    with asyncio.Runner() as runner:
+        runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+        return runner.run(coro)
 
 async def generate_summary(prompt_template: str, model='gemini-3-flash-preview') -> str:
+    # Pace admission to the quota; AI_SEMAPHORE separately caps requests in flight
+    await AI_LIMITER.acquire(estimate_tokens(prompt_template))
     async with AI_SEMAPHORE:
         try:
-            response = await client.aio.models.generate_content(
+            response = await get_client().aio.models.generate_content(
                 model=model,
                 contents=prompt_template,
             )
             
-            await asyncio.sleep(AI_COOLDOWN)
-            
             if response.text:
                 content = response.text.strip()
                 # Normalize whitespace: replace multiple spaces/tabs/non-breaking spaces 
                 # with single space but preserve newlines
-                content = re.sub(r'[ \t\xa0]+', ' ', content)
+                content = _WS_RE.sub(' ', content)
                 return content
             return None
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
-            await asyncio.sleep(AI_COOLDOWN)
             return None
 
+async def write_summaries(tasks, query):
+    """Await summary tasks as they complete and write their results in batches.
+
+    Each task returns the parameters for `query` (e.g. (summary, id)), or None
+    if no summary was generated. Results are written with one executemany and
+    commit per SUMMARY_BATCH_SIZE summaries, or once SUMMARY_FLUSH_INTERVAL
+    seconds have passed with results waiting, while other tasks are in flight.
+    """
+    conn = db.get_connection()
+    pending = []
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal pending, last_flush
+        if pending:
+            with db.transaction():
+                conn.executemany(query, pending)
+            pending = []
+        last_flush = time.monotonic()
+
+    in_flight = {asyncio.ensure_future(task) for task in tasks}
+    try:
+        while in_flight:
+            done, in_flight = await asyncio.wait(
+                in_flight, timeout=SUMMARY_FLUSH_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+            )
+            # Collect every finished result before surfacing a failure, so
+            # summaries completed alongside it are still written
+            errors = []
+            for task in done:
+                try:
+                    params = task.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if params:
+                    pending.append(params)
+            if errors:
+                raise errors[0]
+            if len(pending) >= SUMMARY_BATCH_SIZE or time.monotonic() - last_flush >= SUMMARY_FLUSH_INTERVAL:
+                flush()
+    finally:
+        # Don't leave summaries running if this stage fails or is cancelled,
+        # but keep the ones already generated
+        for task in in_flight:
+            task.cancel()
+        flush()
+
+
 async def generate_section_summaries_for_sitting(sitting_id, only_blanks):
     conn = db.get_connection()
     cursor = conn.cursor()
     query = '''
-        SELECT id, section_title, content_plain, category, section_type 
+        SELECT id, section_title, substr(content_plain, 1, ?) AS content_plain,
+               category, section_type 
         FROM sections    
         WHERE sitting_id = ? 
           AND length(content_plain) > 1500
@@ -61,7 +185,7 @@ async def generate_section_summaries_for_sitting(sitting_id, only_blanks):
     if only_blanks:
         query += ' AND summary IS NULL'
         
-    cursor.execute(query, (sitting_id,))
+    cursor.execute(query, (MAX_CONTENT_CHARS, sitting_id))
     sections = [dict(row) for row in cursor.fetchall()]
     
     if not sections:
@@ -69,87 +193,86 @@ async def generate_section_summaries_for_sitting(sitting_id, only_blanks):
         
     logger.info(f"Generating summaries for {len(sections)} sections in sitting {sitting_id}")
     
-    tasks = []
-    for s in sections:
-        tasks.append(generate_section_summary(s))
-        
-        if len(tasks) >= 20:
-            await asyncio.gather(*tasks)
-            tasks = []
-            
-    if tasks:
-        await asyncio.gather(*tasks)
+    # AI_SEMAPHORE bounds concurrency; summaries are collected as they complete
+    # rather than waiting for the slowest call in a batch
+    await write_summaries(
+        [generate_section_summary(s) for s in sections],
+        'UPDATE sections SET summary = ? WHERE id = ?'
+    )
 
 async def generate_section_summary(section):
     prompt = PQ_PROMPT if section['category'] == 'question' else SECTION_PROMPT
-    prompt = prompt.format(title=section['section_title'], text=section['content_plain'][:20000])
+    prompt = prompt.format(title=section['section_title'], text=section['content_plain'])
     
     summary = await generate_summary(prompt)
     
     if summary:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE sections SET summary = ? WHERE id = ?', (summary, section['id']))
-        conn.commit()
+        return (summary, section['id'])
 
 async def generate_bill_summaries_for_sitting(sitting_id, only_blanks):
     conn = db.get_connection()
     cursor = conn.cursor()
+    # Bills with a second reading in this sitting, together with all of
+    # their sections. Only the first MAX_CONTENT_CHARS of the combined text
+    # are used, so no single section needs to be read beyond that.
     query = '''
-        SELECT DISTINCT b.id, b.title 
+        SELECT b.id, b.title, substr(s.content_plain, 1, ?) AS content_plain
         FROM bills b
         JOIN sections s ON b.id = s.bill_id
-        WHERE s.sitting_id = ?
-        AND s.section_type = 'BP'
+        WHERE b.id IN (
+            SELECT bill_id FROM sections
+            WHERE sitting_id = ? AND section_type = 'BP'
+        )
     '''
     if only_blanks:
         query += ' AND b.summary IS NULL'
+    query += ' ORDER BY s.section_order'
         
-    cursor.execute(query, (sitting_id,))
-    bills = [dict(row) for row in cursor.fetchall()]
+    cursor.execute(query, (MAX_CONTENT_CHARS, sitting_id))
+    bills_by_id = {}
+    for row in cursor.fetchall():
+        bill = bills_by_id.setdefault(row['id'], {'id': row['id'], 'title': row['title'], 'sections': []})
+        if row['content_plain']:
+            bill['sections'].append(row['content_plain'])
+    bills = list(bills_by_id.values())
     
     if not bills:
         return
         
     logger.info(f"Generating summaries for {len(bills)} bills in sitting {sitting_id}")
     
-    for bill in bills:
-        cursor.execute(
-            '''SELECT content_plain FROM sections 
-               WHERE bill_id = ? 
-               ORDER BY section_order''',
-            (bill['id'],)
-        )
-        sections = [row['content_plain'] for row in cursor.fetchall()]
-        
-        if not sections:
-            continue
-            
-        full_text = "\n\n".join(sections)
-        
-        if len(full_text) < 1500:
-            continue
-        
-        prompt = BILL_PROMPT.format(title=bill['title'], text=full_text[:20000])
-        
-        summary = await generate_summary(prompt)
+    await write_summaries(
+        [generate_bill_summary(b) for b in bills],
+        'UPDATE bills SET summary = ? WHERE id = ?'
+    )
+
+async def generate_bill_summary(bill):
+    sections = bill['sections']
+    
+    if not sections:
+        return
         
-        if summary:
-            cursor.execute('UPDATE bills SET summary = ? WHERE id = ?', (summary, bill['id']))
-            conn.commit()
-            logger.info(f"Generated summary for bill {bill['title']}")
+    full_text = "\n\n".join(sections)
+    
+    # First-reading-only bills carry little more than boilerplate
+    if len(full_text.strip()) < 1500:
+        return
+    
+    prompt = BILL_PROMPT.format(title=bill['title'], text=full_text[:MAX_CONTENT_CHARS])
+    
+    summary = await generate_summary(prompt)
+    
+    if summary:
+        logger.info(f"Generated summary for bill {bill['title']}")
+        return (summary, bill['id'])
 
 async def generate_sitting_summaries(start_date_str, end_date_str, only_blanks=False):
     start_date = datetime.strptime(start_date_str, '%d-%m-%Y')
     end_date = datetime.strptime(end_date_str, '%d-%m-%Y')
     
-    dates = []
-    curr = start_date
-    while curr <= end_date:
-        dates.append(curr.strftime('%Y-%m-%d'))
-        curr += timedelta(days=1)
+    num_days = (end_date - start_date).days + 1
         
-    logger.info(f"Summarizing date range: {start_date_str} to {end_date_str} ({len(dates)} days)")
+    logger.info(f"Summarizing date range: {start_date_str} to {end_date_str} ({num_days} days)")
     
     conn = db.get_connection()
     cursor = conn.cursor()
@@ -165,9 +288,27 @@ async def generate_sitting_summaries(start_date_str, end_date_str, only_blanks=F
             
     logger.info(f"Generating summaries for {len(sitting_ids_to_process)} sittings...")
     
-    for sid in sitting_ids_to_process:
-        await generate_section_summaries_for_sitting(sid, only_blanks)
-        await generate_bill_summaries_for_sitting(sid, only_blanks)
+    # Bills are summarised one sitting at a time, since a bill debated over
+    # several sittings must not be summarised twice when only_blanks is set
+    async def generate_bill_summaries():
+        for sid in sitting_ids_to_process:
+            await generate_bill_summaries_for_sitting(sid, only_blanks)
+
+    # Section summaries are independent across sittings, so stages overlap
+    # and AI_SEMAPHORE/AI_LIMITER pace the combined load. SITTING_CONCURRENCY
+    # workers share the sittings between them, so only that many have their
+    # sections in memory at a time, however long the date range.
+    section_sitting_ids = iter(sitting_ids_to_process)
+
+    async def generate_section_summaries():
+        for sid in section_sitting_ids:
+            await generate_section_summaries_for_sitting(sid, only_blanks)
+
+    # If one stage fails, the TaskGroup cancels the rest
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(generate_bill_summaries())
+        for _ in range(SITTING_CONCURRENCY):
+            tg.create_task(generate_section_summaries())
 
     logger.info("Batch processing complete!")
     db.close_connection()
@@ -200,26 +341,32 @@ async def generate_member_summaries(only_blanks):
         ''')
     members = [dict(row) for row in cursor.fetchall()]
     
-    tasks = []
-    
-    async def process_member(member):
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            '''SELECT s.section_title, s.section_type, min.acronym as ministry,
-                      ss.designation, sess.date
+    # Fetch every member's 20 most recent contributions in one query
+    cursor.execute(
+        '''SELECT member_id, section_title, section_type, ministry, designation, date
+           FROM (
+               SELECT ss.member_id, s.section_title, s.section_type, min.acronym as ministry,
+                      ss.designation, sess.date,
+                      ROW_NUMBER() OVER (
+                          PARTITION BY ss.member_id ORDER BY sess.date DESC
+                      ) as rnum
                FROM section_speakers ss
                JOIN sections s ON ss.section_id = s.id
                JOIN sittings sess ON s.sitting_id = sess.id
                LEFT JOIN ministries min ON s.ministry_id = min.id
-               WHERE ss.member_id = ?
-               ORDER BY sess.date DESC
-               LIMIT 20''',
-            (member['id'],)
-        )
-        activity = [dict(row) for row in cursor.fetchall()]
+           )
+           WHERE rnum <= 20
+           ORDER BY member_id, rnum'''
+    )
+    activity_by_member = {}
+    for row in cursor.fetchall():
+        activity_by_member.setdefault(row['member_id'], []).append(dict(row))
+    
+    async def process_member(member):
+        activity = activity_by_member.get(member['id'])
             
-        if not activity:
+        # The prompt asks for 3 topics, which can't be drawn from fewer items
+        if not activity or len(activity) < MIN_MEMBER_ACTIVITY:
             return
             
         activity_lines = []
@@ -235,25 +382,16 @@ async def generate_member_summaries(only_blanks):
         summary = await generate_summary(prompt)
         
         if summary:
-            cursor.execute(
-                '''INSERT INTO member_summaries (member_id, summary, last_updated)
-                   VALUES (?, ?, CURRENT_TIMESTAMP)
-                   ON CONFLICT(member_id) DO UPDATE SET 
-                   summary = excluded.summary, 
-                   last_updated = CURRENT_TIMESTAMP''',
-                (member['id'], summary)
-            )
-            conn.commit()
+            return (member['id'], summary)
     
-    for m in members:
-        tasks.append(process_member(m))
-        
-        if len(tasks) >= 20:
-            await asyncio.gather(*tasks)
-            tasks = []
-            
-    if tasks:
-        await asyncio.gather(*tasks)
+    await write_summaries(
+        [process_member(m) for m in members],
+        '''INSERT INTO member_summaries (member_id, summary, last_updated)
+           VALUES (?, ?, CURRENT_TIMESTAMP)
+           ON CONFLICT(member_id) DO UPDATE SET 
+           summary = excluded.summary, 
+           last_updated = CURRENT_TIMESTAMP'''
+    )
     
     logger.info("Member summaries complete")
     db.close_connection()
@@ -276,7 +414,7 @@ if __name__ == "__main__":
         sys.exit(1)
     
     if summarize_members:
-        asyncio.run(generate_member_summaries(only_blank))
+        run(generate_member_summaries(only_blank))
     else:
         dates = [arg for arg in args if not arg.startswith('--')]
         if len(dates) < 1:
@@ -286,4 +424,4 @@ if __name__ == "__main__":
         start = dates[0]
         end = dates[1] if len(dates) > 1 else start
 
-        asyncio.run(generate_sitting_summaries(start, end, only_blank))
+        run(generate_sitting_summaries(start, end, only_blank))
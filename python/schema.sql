@@ -75,6 +75,11 @@ CREATE INDEX IF NOT EXISTS idx_sections_sitting ON sections(sitting_id);
 CREATE INDEX IF NOT EXISTS idx_sections_ministry ON sections(ministry_id);
 CREATE INDEX IF NOT EXISTS idx_sections_category ON sections(category);
 CREATE INDEX IF NOT EXISTS idx_sections_type ON sections(section_type);
+CREATE INDEX IF NOT EXISTS idx_sections_bill_order ON sections(bill_id, section_order);
+-- Matches the duplicate-section window in cleanup_duplicates_sqlite.py
+CREATE INDEX IF NOT EXISTS idx_sections_dedup ON sections(sitting_id, section_title, section_type, created_at);
+-- Sections still waiting for a summary (generate_summaries_sqlite.py --only-blank)
+CREATE INDEX IF NOT EXISTS idx_sections_blank_summary ON sections(sitting_id) WHERE summary IS NULL;
 
 -- Section speakers (junction: sections <-> members with time snapshot)
 CREATE TABLE IF NOT EXISTS section_speakers (